@@ -1,7 +1,10 @@
 # dag_viz.py
-from graphviz import Digraph
 
 def generate_dag_image(path="dag.png"):
+    # imported lazily: graphviz shells out to `dot` and isn't needed unless
+    # a diagram is actually requested
+    from graphviz import Digraph
+
     dot = Digraph(comment="Debate LangGraph DAG", format="png")
     dot.node("START")
     dot.node("UserInput", "UserInputNode\n(get topic)")
@@ -39,3 +39,13 @@ def build_graph(logger_path=None):
     graph.add_edge("Judge", END)
 
     return graph
+
+# The DAG is static, so build it once and share it: repeated debates (or
+# threads) reuse the same immutable graph instead of re-paying setup cost.
+_GRAPH = None
+
+def get_graph():
+    global _GRAPH
+    if _GRAPH is None:
+        _GRAPH = build_graph()
+    return _GRAPH
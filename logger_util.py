@@ -1,27 +1,245 @@
-# logger_util.py
-import os
-from datetime import datetime
-
-LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-
-def create_log_file(prefix="debate_log"):
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{prefix}_{ts}.txt"
-    path = os.path.join(LOG_DIR, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(f"Debate log started: {datetime.now().isoformat()}\n\n")
-    return path
-
-class FileLogger:
-    def __init__(self, path):
-        self.path = path
-
-    def log(self, text):
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        line = f"[{ts}] {text}\n"
-        with open(self.path, "a", encoding="utf-8") as f:
-            f.write(line)
-
-    def info(self, text):
-        self.log(text)
+# logger_util.py
+import atexit
+import ctypes
+import os
+import platform
+import queue
+import threading
+import time
+from datetime import datetime
+
+LOG_DIR = "logs"
+os.makedirs(LOG_DIR, exist_ok=True)
+
+def create_log_file(prefix="debate_log"):
+    ts = time.strftime("%Y%m%d_%H%M%S")
+    filename = f"{prefix}_{ts}.txt"
+    path = os.path.join(LOG_DIR, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"Debate log started: {datetime.now().isoformat()}\n\n")
+    return path
+
+# sentinel pushed on close() to stop the writer thread
+_STOP = object()
+
+# ---------------------------------------------------------
+# Optional io_uring backend (Linux + liburing only)
+# ---------------------------------------------------------
+class _IoUringSqe(ctypes.Structure):
+    # struct io_uring_sqe, 64 bytes (unions flattened to the members we use)
+    _fields_ = [
+        ("opcode", ctypes.c_uint8),
+        ("flags", ctypes.c_uint8),
+        ("ioprio", ctypes.c_uint16),
+        ("fd", ctypes.c_int32),
+        ("off", ctypes.c_uint64),
+        ("addr", ctypes.c_uint64),
+        ("len", ctypes.c_uint32),
+        ("rw_flags", ctypes.c_uint32),
+        ("user_data", ctypes.c_uint64),
+        ("buf_index", ctypes.c_uint16),
+        ("personality", ctypes.c_uint16),
+        ("splice_fd_in", ctypes.c_int32),
+        ("addr3", ctypes.c_uint64),
+        ("_pad2", ctypes.c_uint64),
+    ]
+
+class _IoUringCqe(ctypes.Structure):
+    # struct io_uring_cqe (fixed part; res is the write(2)-style result)
+    _fields_ = [
+        ("user_data", ctypes.c_uint64),
+        ("res", ctypes.c_int32),
+        ("flags", ctypes.c_uint32),
+    ]
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+def _load_liburing():
+    # the -ffi variant exports the normally-inline helpers
+    # (io_uring_get_sqe, io_uring_wait_cqe, ...) as real symbols
+    for name in ("liburing-ffi.so.2", "liburing-ffi.so", "liburing.so.2", "liburing.so"):
+        try:
+            return ctypes.CDLL(name)
+        except OSError:
+            continue
+    raise OSError("liburing not available")
+
+class IoUringWriter:
+    """Submit batched log buffers as io_uring write SQEs.
+
+    Each batch is copied into a registered fixed buffer and submitted as a
+    single IORING_OP_WRITE_FIXED, so the kernel write overlaps with the
+    writer thread formatting the next batch; the previous completion is
+    reaped lazily before the buffer is reused. Raises OSError when the
+    platform or liburing doesn't support this, in which case FileLogger
+    falls back to plain buffered writes.
+    """
+
+    _QUEUE_DEPTH = 8
+    _BUF_SIZE = 1 << 16
+    _OP_WRITE_FIXED = 5  # IORING_OP_WRITE_FIXED
+
+    def __init__(self, fd):
+        if platform.system() != "Linux":
+            raise OSError("io_uring requires Linux")
+        lib = _load_liburing()
+        for sym in ("io_uring_queue_init", "io_uring_get_sqe", "io_uring_submit",
+                    "io_uring_wait_cqe", "io_uring_cqe_seen",
+                    "io_uring_register_buffers", "io_uring_queue_exit"):
+            if not hasattr(lib, sym):
+                raise OSError(f"liburing lacks {sym}")
+        lib.io_uring_get_sqe.restype = ctypes.c_void_p
+        self._lib = lib
+        self._fd = fd
+        # struct io_uring is opaque to us; over-allocate to be safe
+        self._ring = ctypes.create_string_buffer(256)
+        rc = lib.io_uring_queue_init(self._QUEUE_DEPTH, self._ring, 0)
+        if rc < 0:
+            raise OSError(-rc, "io_uring_queue_init failed")
+        self._buf = ctypes.create_string_buffer(self._BUF_SIZE)
+        self._iov = _IoVec(ctypes.cast(self._buf, ctypes.c_void_p), self._BUF_SIZE)
+        rc = lib.io_uring_register_buffers(self._ring, ctypes.byref(self._iov), 1)
+        if rc < 0:
+            lib.io_uring_queue_exit(self._ring)
+            raise OSError(-rc, "io_uring_register_buffers failed")
+        # the chunk whose write is in flight, so a failed/short completion
+        # can be retried synchronously without losing log data
+        self._inflight = None
+
+    def _reap(self):
+        if self._inflight is None:
+            return
+        chunk, self._inflight = self._inflight, None
+        cqe_ptr = ctypes.c_void_p()
+        rc = self._lib.io_uring_wait_cqe(self._ring, ctypes.byref(cqe_ptr))
+        if rc < 0 or not cqe_ptr:
+            # couldn't reap the completion: assume the worst and rewrite
+            os.write(self._fd, chunk)
+            return
+        res = ctypes.cast(cqe_ptr, ctypes.POINTER(_IoUringCqe)).contents.res
+        self._lib.io_uring_cqe_seen(self._ring, cqe_ptr)
+        if res < 0:
+            # failed write (e.g. EINVAL from kernels without "current
+            # position" offset semantics): retry the plain syscall path
+            os.write(self._fd, chunk)
+        elif res < len(chunk):
+            os.write(self._fd, chunk[res:])
+
+    def write(self, data: bytes):
+        for start in range(0, len(data), self._BUF_SIZE):
+            chunk = data[start:start + self._BUF_SIZE]
+            # wait for the previous write before overwriting the fixed buffer
+            self._reap()
+            ctypes.memmove(self._buf, chunk, len(chunk))
+            sqe_ptr = self._lib.io_uring_get_sqe(self._ring)
+            if not sqe_ptr:
+                # submission queue full (shouldn't happen at depth 8): degrade
+                os.write(self._fd, chunk)
+                continue
+            sqe = ctypes.cast(sqe_ptr, ctypes.POINTER(_IoUringSqe)).contents
+            ctypes.memset(ctypes.byref(sqe), 0, ctypes.sizeof(_IoUringSqe))
+            sqe.opcode = self._OP_WRITE_FIXED
+            sqe.fd = self._fd
+            sqe.off = 0xFFFFFFFFFFFFFFFF  # -1: append at current file offset
+            sqe.addr = ctypes.cast(self._buf, ctypes.c_void_p).value
+            sqe.len = len(chunk)
+            sqe.buf_index = 0
+            if self._lib.io_uring_submit(self._ring) < 1:
+                # submission failed: nothing in flight, write synchronously
+                os.write(self._fd, chunk)
+                continue
+            self._inflight = chunk
+
+    def close(self):
+        self._reap()
+        self._lib.io_uring_queue_exit(self._ring)
+
+class FileLogger:
+    # max lines coalesced into one write; flush after this much idle time
+    _BATCH_MAX = 64
+    _IDLE_FLUSH_S = 0.1
+
+    def __init__(self, path):
+        self.path = path
+        # keep one file descriptor open for the logger's lifetime instead of
+        # paying open/close syscalls on every log call; 64KB buffer so small
+        # lines are flushed lazily
+        self._fh = open(path, "a", encoding="utf-8", buffering=1 << 16)
+        # producers only format and enqueue; a single background consumer
+        # coalesces queued lines into one write per batch (Quill/Serilog
+        # batched-sink model), so callers never block on disk I/O
+        self._queue = queue.SimpleQueue()
+        # prefer the io_uring backend where available; any failure (non-Linux,
+        # no liburing, old kernel) silently selects the buffered-write path
+        self._uring = None
+        if platform.system() == "Linux":
+            try:
+                self._uring = IoUringWriter(self._fh.fileno())
+            except OSError:
+                self._uring = None
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+        # timestamp cache: the formatted string only changes once per second
+        self._last_sec = -1
+        self._ts_str = ""
+        atexit.register(self.close)
+
+    def log(self, text):
+        # format the timestamp at most once per second; bursts of log lines
+        # within the same second reuse the cached string
+        now_sec = int(time.time())
+        if now_sec != self._last_sec:
+            self._ts_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now_sec))
+            self._last_sec = now_sec
+        self._queue.put(f"[{self._ts_str}] {text}\n")
+
+    def info(self, text):
+        self.log(text)
+
+    def _write(self, text):
+        if self._uring is not None:
+            self._uring.write(text.encode("utf-8"))
+        else:
+            self._fh.write(text)
+
+    def _flush(self):
+        # io_uring writes go straight to the kernel; only the buffered path
+        # holds data back
+        if self._uring is None:
+            self._fh.flush()
+
+    def _drain(self):
+        q = self._queue
+        while True:
+            try:
+                item = q.get(timeout=self._IDLE_FLUSH_S)
+            except queue.Empty:
+                # nothing arrived for a while: push buffered lines to disk
+                self._flush()
+                continue
+            if item is _STOP:
+                self._flush()
+                return
+            batch = [item]
+            while len(batch) < self._BATCH_MAX:
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._write("".join(batch))
+                    self._flush()
+                    return
+                batch.append(item)
+            self._write("".join(batch))
+
+    def close(self):
+        if self._fh is None or self._fh.closed:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout=5)
+        if self._uring is not None:
+            self._uring.close()
+            self._uring = None
+        self._fh.close()
@@ -1,28 +1,51 @@
 # nodes.py
-from typing import TypedDict, List, Dict, Any
-from collections import defaultdict
-import random
+from typing import List, Set
+from array import array
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+try:
+    from xxhash import xxh64_intdigest as _digest64
+except ImportError:
+    import hashlib
+    def _digest64(data: bytes) -> int:
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
 
 # ---------------------------------------------------------
-# State TypedDict for LangGraph usage (simple dict for demo)
+# Debate state: a slots dataclass, so every field access is a fixed
+# attribute slot instead of a dict hash+probe, and the containers are
+# initialized once here rather than via setdefault at each use site
 # ---------------------------------------------------------
-class DebateState(TypedDict, total=False):
-    topic: str
-    round: int
-    transcript: List[Dict[str, Any]]        # list of {"round":1,"agent":"Scientist","text":"..."}
-    memory_scientist: List[str]            # summaries / bullet points relevant to Scientist
-    memory_philosopher: List[str]          # summaries / bullet points relevant to Philosopher
-    used_args: List[str]                   # set/list to avoid repeats
-    winner: str
-    judge_summary: str
-    # any other helper fields
+@dataclass(slots=True)
+class DebateState:
+    topic: str = ""
+    round: int = 0
+    # transcript kept as parallel arrays (SoA) instead of list-of-dicts so
+    # the judge can scan texts/agents without per-item dict lookups
+    transcript_rounds: array = field(default_factory=lambda: array("H"))
+    transcript_agents: array = field(default_factory=lambda: array("B"))  # 0=Scientist, 1=Philosopher
+    transcript_texts: List[str] = field(default_factory=list)
+    memory_scientist: deque = field(default_factory=lambda: deque(maxlen=3))    # rolling last-3 bullets
+    memory_philosopher: deque = field(default_factory=lambda: deque(maxlen=3))  # rolling last-3 bullets
+    used_args: Set[str] = field(default_factory=set)   # lowercased args already spoken, O(1) membership
+    summary_scientist: str = ""
+    summary_philosopher: str = ""
+    winner: str = ""
+    judge_summary: str = ""
+    judge_justification: str = ""
+    # helper fields maintained by user_input_node/commit_turn
+    _topic_lower: str = ""
+    _summary_lines: List[str] = field(default_factory=list)
+    _mem_sci_hashes: Set[int] = field(default_factory=set)
+    _mem_phil_hashes: Set[int] = field(default_factory=set)
 
 # ---------------------------------------------------------
 # Utility validators & helpers
 # ---------------------------------------------------------
 def check_turn(state: DebateState, expected_agent: str, logger=None):
     # expected_agent speaks on next round
-    current_round = state.get("round", 0)
+    current_round = state.round
     # rounds are 1..8. round parity: Scientist starts (odd->Scientist)
     # But we receive expected_agent, so just ensure round parity aligns
     if current_round >= 8:
@@ -31,41 +54,56 @@ def check_turn(state: DebateState, expected_agent: str, logger=None):
         logger.info(f"Validating turn: round {current_round+1} expected {expected_agent}")
 
 def has_repeat(candidate: str, state: DebateState):
-    used = set(state.get("used_args", []))
-    s = candidate.strip().lower()
-    return s in used
+    return candidate.strip().lower() in state.used_args
 
 def mark_used(candidate: str, state: DebateState):
-    used = state.setdefault("used_args", [])
-    used.append(candidate.strip().lower())
+    state.used_args.add(candidate.strip().lower())
 
-def append_transcript(agent: str, text: str, state: DebateState):
-    transcript = state.setdefault("transcript", [])
-    r = state.setdefault("round", 0) + 1
-    state["round"] = r
-    transcript.append({"round": r, "agent": agent, "text": text})
-
-def update_memory_for_agent(agent: str, text: str, state: DebateState):
-    """Store a short bullet point for the agent to see (but not full transcript)."""
-    bullet = make_bullet_from_text(text)
-    if agent == "Scientist":
-        mem = state.setdefault("memory_scientist", [])
-        mem.append(bullet)
-    else:
-        mem = state.setdefault("memory_philosopher", [])
-        mem.append(bullet)
+# agent name <-> small-int id for the SoA transcript arrays
+AGENT_NAMES = ("Scientist", "Philosopher")
+_AGENT_IDS = {name: i for i, name in enumerate(AGENT_NAMES)}
 
 def make_bullet_from_text(text: str) -> str:
     # naive summarizer / bullet generator (can be swapped with an LLM)
-    # Keep 1-2 short sentences extracted heuristically.
-    sentences = [s.strip() for s in text.split(".") if s.strip()]
-    if not sentences:
+    # Keep 1-2 short sentences; str.partition never materializes a list of
+    # every sentence, which matters once real LLM outputs replace the
+    # templates.
+    first, sep, rest = text.partition(".")
+    bullet = first.strip()
+    if sep:
+        second = rest.partition(".")[0].strip()
+        if second:
+            bullet += ". " + second
+    if not bullet:
         return text[:120]
-    bullet = sentences[0]
-    if len(sentences) > 1:
-        bullet += ". " + sentences[1]
     return bullet[:250]
 
+def commit_turn(agent: str, text: str, state: DebateState, logger=None) -> int:
+    """Fused per-turn commit: advance the round, append the transcript
+    fields, store the agent's memory bullet and emit the log line in one
+    pass instead of three separate helpers re-walking the state."""
+    r = state.round + 1
+    state.round = r
+    agent_id = _AGENT_IDS[agent]
+    state.transcript_rounds.append(r)
+    state.transcript_agents.append(agent_id)
+    state.transcript_texts.append(text)
+    bullet = make_bullet_from_text(text)
+    # track uniqueness as 8-byte hashes so the judge never re-hashes the
+    # full bullet strings (collisions are fine for heuristic scoring)
+    if agent_id == 0:
+        state.memory_scientist.append(bullet)
+        state._mem_sci_hashes.add(hash(bullet))
+    else:
+        state.memory_philosopher.append(bullet)
+        state._mem_phil_hashes.add(hash(bullet))
+    # accumulate the judge's round-by-round summary as turns complete so
+    # judge_node doesn't re-walk the whole transcript at the end
+    state._summary_lines.append(f"R{r} {agent}: {text}")
+    if logger:
+        logger.info(f"[Round {r}] {agent}: {text}")
+    return r
+
 # ---------------------------------------------------------
 # Simulated agent argument generators (deterministic + seeded)
 # ---------------------------------------------------------
@@ -83,129 +121,281 @@ PHILOSOPHY_TEMPLATES = [
     "Historical overregulation has sometimes delayed progress; careful, flexible approaches are better than medical-style regulation for {}.",
 ]
 
-def agent_generate_argument(agent: str, topic: str, round_num: int, state: DebateState) -> str:
-    # deterministic-ish selection based on topic + round to avoid repeats
-    seed = (hash(topic) ^ round_num ^ (1 if agent=="Scientist" else 2)) & 0xFFFFFFFF
-    random.seed(seed)
-    if agent == "Scientist":
-        templ = random.choice(SCIENCE_TEMPLATES)
-        # choose a concrete subexample from topic if possible
-        sub = pick_subexample(topic)
-        return templ.format(sub)
-    else:
-        templ = random.choice(PHILOSOPHY_TEMPLATES)
-        sub = pick_subexample(topic)
-        return templ.format(sub)
+@lru_cache(maxsize=8)
+def _topic_key(topic: str) -> int:
+    """64-bit keyed digest of the topic; cached so it's hashed once per run."""
+    return _digest64(topic.encode("utf-8"))
 
-def pick_subexample(topic: str) -> str:
+# salt folding the round number into the topic key
+_SUB_SALT = 0x9E3779B9
+_MASK64 = (1 << 64) - 1
+
+def _mix64(x: int) -> int:
+    """splitmix64 finalizer: diffuses every input bit across the word, so
+    small modulos downstream see more than the low bits of the input."""
+    x = (x ^ (x >> 33)) * 0xFF51AFD7ED558CCD & _MASK64
+    x = (x ^ (x >> 33)) * 0xC4CEB9FE1A85EC53 & _MASK64
+    return x ^ (x >> 33)
+
+async def agent_generate_argument(agent: str, topic: str, round_num: int, state: DebateState) -> str:
+    # async so a real LLM backend (AsyncOpenAI-style client) can be awaited
+    # here without touching the agent nodes; the simulated version returns
+    # immediately.
+    # deterministic selection keyed on topic digest + round: two hash mixes
+    # instead of reseeding the global Mersenne Twister per call, and no
+    # shared RNG state so concurrent rounds stay thread-safe
+    key = _topic_key(topic)
+    agent_bit = 1 if agent == "Scientist" else 2
+    templates = SCIENCE_TEMPLATES if agent == "Scientist" else PHILOSOPHY_TEMPLATES
+    # finalize-mix the round into the topic key: a bare XOR with rounds 1-8
+    # only perturbed the low bits, so `% 4` made rounds r and r+4 pick the
+    # same template every time
+    mixed = _mix64(key ^ (round_num * _SUB_SALT) ^ agent_bit)
+    idx = mixed % len(templates)
+    # choose a concrete subexample from topic if possible (separate bits of
+    # the same mix, so it stays decorrelated from the template choice)
+    sub = pick_subexample(topic, mixed >> 8, topic_lower=state._topic_lower or None)
+    return templates[idx].format(sub)
+
+# candidate phrases hoisted to module scope: pick_subexample allocates
+# nothing per call
+_AI_KEYWORDS = frozenset({"ai", "artificial"})
+_AI_CANDS = ("autonomous weapons", "medical diagnosis systems", "large-scale surveillance", "automated hiring systems")
+_PRIV_CANDS = ("data sharing", "user profiling", "behavioral tracking")
+_DEFAULT_CANDS = ("high-risk applications", "societal-scale deployments")
+
+def pick_subexample(topic: str, key: int = 0, topic_lower: str = None) -> str:
     # very small heuristic: return a short phrase derived from topic
-    t = topic.lower()
-    candidates = []
-    if "ai" in t or "artificial" in t:
-        candidates = ["autonomous weapons", "medical diagnosis systems", "large-scale surveillance", "automated hiring systems"]
-    elif "privacy" in t:
-        candidates = ["data sharing", "user profiling", "behavioral tracking"]
-    else:
-        candidates = [topic, "high-risk applications", "societal-scale deployments"]
-    return random.choice(candidates)
+    t = topic_lower if topic_lower is not None else topic.lower()
+    if any(k in t for k in _AI_KEYWORDS):
+        return _AI_CANDS[key % len(_AI_CANDS)]
+    if "privacy" in t:
+        return _PRIV_CANDS[key % len(_PRIV_CANDS)]
+    # the topic itself stays a candidate alongside the generic fallbacks
+    idx = key % (len(_DEFAULT_CANDS) + 1)
+    return topic if idx == 0 else _DEFAULT_CANDS[idx - 1]
+
+# ---------------------------------------------------------
+# Judge keyword scoring
+# Each keyword owns one bit; a transcript text is reduced to a uint64 mask
+# of keyword hits, and scoring becomes bitwise tests over the mask arrays.
+# ---------------------------------------------------------
+_SCI_PRIMARY = ("risk", "safety", "standards", "audit", "testing", "accountab")
+_SCI_SECONDARY = ("data", "medical", "surveil", "autonomous")
+_PHIL_PRIMARY = ("freedom", "progress", "ethical", "autonomy", "philosoph")
+_PHIL_SECONDARY = ("overregulate", "slow", "creativity", "experimen")
+_JUDGE_KEYWORDS = _SCI_PRIMARY + _SCI_SECONDARY + _PHIL_PRIMARY + _PHIL_SECONDARY
+
+def _group_bits(group):
+    return sum(1 << _JUDGE_KEYWORDS.index(k) for k in group)
+
+_SCI_PRIMARY_BITS = _group_bits(_SCI_PRIMARY)
+_SCI_SECONDARY_BITS = _group_bits(_SCI_SECONDARY)
+_PHIL_PRIMARY_BITS = _group_bits(_PHIL_PRIMARY)
+_PHIL_SECONDARY_BITS = _group_bits(_PHIL_SECONDARY)
+
+# Multi-pattern matcher for the masks: one pass over the text instead of
+# one substring probe per keyword. Backends, fastest available first:
+#   1. numba-compiled byte scan accumulating hit bits branchlessly
+#   2. pyahocorasick automaton
+#   3. compiled regex alternation
+def _scan_mask_py(data, flat, offs, lens):
+    # single linear walk over the text bytes; at each position, keywords
+    # whose first byte matches are compared in place and their bit OR'd in.
+    # Plain-Python body so numba can compile it unchanged.
+    mask = 0
+    n = len(data)
+    nkw = len(lens)
+    for i in range(n):
+        c = data[i]
+        for j in range(nkw):
+            bit = 1 << j
+            if mask & bit:
+                continue
+            o = offs[j]
+            if flat[o] != c:
+                continue
+            length = lens[j]
+            if i + length > n:
+                continue
+            k = 1
+            while k < length and data[i + k] == flat[o + k]:
+                k += 1
+            if k == length:
+                mask |= bit
+    return mask
+
+try:
+    import numpy as np
+    from numba import njit
+
+    _KW_FLAT = np.frombuffer("".join(_JUDGE_KEYWORDS).encode("ascii"), dtype=np.uint8)
+    _KW_LENS = np.array([len(k) for k in _JUDGE_KEYWORDS], dtype=np.int64)
+    _KW_OFFS = np.concatenate(([0], np.cumsum(_KW_LENS)[:-1]))
+    _scan_kernel = njit(cache=True)(_scan_mask_py)
+
+    def _keyword_mask(txt: str) -> int:
+        """Collapse a lowercased text to a bitmask of judge-keyword hits."""
+        data = np.frombuffer(txt.encode("utf-8"), dtype=np.uint8)
+        return int(_scan_kernel(data, _KW_FLAT, _KW_OFFS, _KW_LENS))
+except ImportError:
+    try:
+        import ahocorasick
+
+        _KW_AC = ahocorasick.Automaton()
+        for _i, _k in enumerate(_JUDGE_KEYWORDS):
+            _KW_AC.add_word(_k, 1 << _i)
+        _KW_AC.make_automaton()
+
+        def _keyword_mask(txt: str) -> int:
+            """Collapse a lowercased text to a bitmask of judge-keyword hits."""
+            mask = 0
+            for _, bit in _KW_AC.iter(txt):
+                mask |= bit
+            return mask
+    except ImportError:
+        import re
+
+        # longest-first alternation so no keyword shadows a longer one
+        _KW_RE = re.compile("|".join(map(re.escape, sorted(_JUDGE_KEYWORDS, key=len, reverse=True))))
+        _KW_BITS = {k: 1 << i for i, k in enumerate(_JUDGE_KEYWORDS)}
+
+        def _keyword_mask(txt: str) -> int:
+            """Collapse a lowercased text to a bitmask of judge-keyword hits."""
+            mask = 0
+            for m in _KW_RE.finditer(txt):
+                mask |= _KW_BITS[m.group()]
+            return mask
+
+try:
+    import numpy as np
+    from numba import njit
+
+    @njit(cache=True)
+    def _score_kernel(masks, agents, sci_p, sci_s, phil_p, phil_s):
+        sci = 0
+        phil = 0
+        for i in range(masks.shape[0]):
+            m = masks[i]
+            if agents[i] == 0:  # Scientist
+                if m & sci_p:
+                    sci += 2
+                if m & sci_s:
+                    sci += 1
+            else:
+                if m & phil_p:
+                    phil += 2
+                if m & phil_s:
+                    phil += 1
+        return sci, phil
+
+    def _score_transcript(masks, agents):
+        return _score_kernel(
+            np.asarray(masks, dtype=np.uint64),
+            np.asarray(agents, dtype=np.uint8),
+            np.uint64(_SCI_PRIMARY_BITS),
+            np.uint64(_SCI_SECONDARY_BITS),
+            np.uint64(_PHIL_PRIMARY_BITS),
+            np.uint64(_PHIL_SECONDARY_BITS),
+        )
+except ImportError:
+    # numba/numpy not installed: same loop, interpreted
+    def _score_transcript(masks, agents):
+        sci = 0
+        phil = 0
+        for m, a in zip(masks, agents):
+            if a == 0:
+                if m & _SCI_PRIMARY_BITS:
+                    sci += 2
+                if m & _SCI_SECONDARY_BITS:
+                    sci += 1
+            else:
+                if m & _PHIL_PRIMARY_BITS:
+                    phil += 2
+                if m & _PHIL_SECONDARY_BITS:
+                    phil += 1
+        return sci, phil
 
 # ---------------------------------------------------------
 # Node functions: these will be used in the graph
 # Signature assumed: node(state: DebateState, config=None, runtime=None)
 # ---------------------------------------------------------
 def user_input_node(state: DebateState, config=None, runtime=None):
-    # expects state['topic'] already set by CLI (main.py)
-    topic = state.get("topic", "").strip()
+    # expects state.topic already set by CLI (main.py); the transcript,
+    # memory and helper containers are initialized by the dataclass defaults
+    topic = state.topic.strip()
     if not topic:
         raise ValueError("No topic provided")
-    # initialize round, transcript, used_args
-    state.setdefault("round", 0)
-    state.setdefault("transcript", [])
-    state.setdefault("used_args", [])
-    # store initial memory lists
-    state.setdefault("memory_scientist", [])
-    state.setdefault("memory_philosopher", [])
+    # cache the lowercased topic so pick_subexample doesn't re-lower per call
+    state._topic_lower = topic.lower()
     return {"status":"ok","topic":topic}
 
-def agent_node_scientist(state: DebateState, config=None, runtime=None):
+async def agent_node_scientist(state: DebateState, config=None, runtime=None):
     logger = getattr(runtime, "logger", None)
-    expected_agent = "Scientist"
-    check_turn(state, expected_agent, logger=logger)
+    # turn-order validation is debug-only: the unrolled driver guarantees
+    # the schedule, and `python -O` strips the check entirely
+    if __debug__:
+        check_turn(state, "Scientist", logger=logger)
     # generate argument
-    rnum = state.get("round", 0) + 1
-    arg = agent_generate_argument("Scientist", state["topic"], rnum, state)
+    rnum = state.round + 1
+    arg = await agent_generate_argument("Scientist", state.topic, rnum, state)
     if has_repeat(arg, state):
         # slight modification to avoid exact repeat
-        arg += " (further clarification: " + pick_subexample(state["topic"]) + ")"
+        arg += " (further clarification: " + pick_subexample(state.topic, rnum, state._topic_lower) + ")"
     mark_used(arg, state)
-    append_transcript("Scientist", arg, state)
-    update_memory_for_agent("Scientist", arg, state)
-    if logger:
-        logger.info(f"[Round {state['round']}] Scientist: {arg}")
+    commit_turn("Scientist", arg, state, logger=logger)
     return {"text": arg}
 
-def agent_node_philosopher(state: DebateState, config=None, runtime=None):
+async def agent_node_philosopher(state: DebateState, config=None, runtime=None):
     logger = getattr(runtime, "logger", None)
-    expected_agent = "Philosopher"
-    check_turn(state, expected_agent, logger=logger)
-    rnum = state.get("round", 0) + 1
-    arg = agent_generate_argument("Philosopher", state["topic"], rnum, state)
+    if __debug__:
+        check_turn(state, "Philosopher", logger=logger)
+    rnum = state.round + 1
+    arg = await agent_generate_argument("Philosopher", state.topic, rnum, state)
     if has_repeat(arg, state):
-        arg += " (added thought: " + pick_subexample(state["topic"]) + ")"
+        arg += " (added thought: " + pick_subexample(state.topic, rnum, state._topic_lower) + ")"
     mark_used(arg, state)
-    append_transcript("Philosopher", arg, state)
-    update_memory_for_agent("Philosopher", arg, state)
-    if logger:
-        logger.info(f"[Round {state['round']}] Philosopher: {arg}")
+    commit_turn("Philosopher", arg, state, logger=logger)
     return {"text": arg}
 
-def memory_node(state: DebateState, config=None, runtime=None):
+async def memory_node(state: DebateState, config=None, runtime=None):
     # This node can optionally summarize memory for each agent (here already stored)
     # We produce concise summaries (join bullets)
-    mem_sci = state.get("memory_scientist", [])
-    mem_phil = state.get("memory_philosopher", [])
-    # naive summarization: join bullets with semicolons
-    state["summary_scientist"] = "; ".join(mem_sci[-3:])  # last 3
-    state["summary_philosopher"] = "; ".join(mem_phil[-3:])
+    # naive summarization: join bullets with semicolons; the deques already
+    # hold only the last 3, so no slice is needed
+    state.summary_scientist = "; ".join(state.memory_scientist)
+    state.summary_philosopher = "; ".join(state.memory_philosopher)
     if getattr(runtime, "logger", None):
         runtime.logger.info("Memory updated for both agents.")
     return {"ok": True}
 
-def judge_node(state: DebateState, config=None, runtime=None):
+async def judge_node(state: DebateState, config=None, runtime=None):
     # Examine transcript + memory and produce final verdict after 8 rounds
-    transcript = state.get("transcript", [])
-    if len(transcript) < 8:
+    texts = state.transcript_texts
+    agents = state.transcript_agents
+    if len(texts) < 8:
         raise ValueError("Debate incomplete; judge invoked too early")
     # Heuristics for deciding winner:
     # Count how many "risk", "safety", "standards" tokens for Scientist
-    # vs "freedom", "progress", "philosophy" tokens for Philosopher
-    sci_score = 0
-    phil_score = 0
-    for item in transcript:
-        txt = item["text"].lower()
-        if item["agent"] == "Scientist":
-            if any(k in txt for k in ["risk", "safety", "standards", "audit", "testing", "accountab"]):
-                sci_score += 2
-            if any(k in txt for k in ["data", "medical", "surveil", "autonomous"]):
-                sci_score += 1
-        else:
-            if any(k in txt for k in ["freedom", "progress", "ethical", "autonomy", "philosoph"]):
-                phil_score += 2
-            if any(k in txt for k in ["overregulate", "slow", "creativity", "experimen"]):
-                phil_score += 1
-
-    # also consider number of unique supporting bullets
-    sci_score += len(set(state.get("memory_scientist", [])))
-    phil_score += len(set(state.get("memory_philosopher", [])))
-
-    # produce summary
-    summary_lines = []
-    summary_lines.append(f"Topic: {state.get('topic')}")
-    summary_lines.append("Transcript summary (round by round):")
-    for t in transcript:
-        summary_lines.append(f"R{t['round']} {t['agent']}: {t['text']}")
-    summary = "\n".join(summary_lines)
-    state["judge_summary"] = summary
+    # vs "freedom", "progress", "philosophy" tokens for Philosopher.
+    # Each text is reduced to a bitmask of keyword hits once, then scored
+    # in a tight loop over the SoA agent/mask arrays (JIT-compiled when
+    # numba is installed).
+    masks = [_keyword_mask(txt.lower()) for txt in texts]
+    sci_score, phil_score = _score_transcript(masks, agents)
+
+    # also consider number of unique supporting bullets (tracked as hashes
+    # at commit time, so this is O(1) here)
+    sci_score += len(state._mem_sci_hashes)
+    phil_score += len(state._mem_phil_hashes)
+
+    # produce summary from the lines accumulated per turn by commit_turn
+    summary = (
+        f"Topic: {state.topic}\n"
+        "Transcript summary (round by round):\n"
+        + "\n".join(state._summary_lines)
+    )
+    state.judge_summary = summary
 
     if sci_score > phil_score:
         winner = "Scientist"
@@ -215,8 +405,8 @@ def judge_node(state: DebateState, config=None, runtime=None):
         winner = "Tie"
 
     justification = f"sci_score={sci_score}, phil_score={phil_score} -> winner: {winner}"
-    state["winner"] = winner
-    state["judge_justification"] = justification
+    state.winner = winner
+    state.judge_justification = justification
 
     if getattr(runtime, "logger", None):
         runtime.logger.info("[Judge] Summary and verdict produced.")